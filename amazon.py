@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import json
+import re
+from typing import Optional, Tuple
+from urllib.parse import urljoin
+from lxml import etree, html
+from http_session import SESSION as _SESSION, TIMEOUT, download
+
+# Amazonのページ解析で使う正規表現
+_IMG_SIZE_RE = re.compile(r'\._.*?_\.jpg')
+
+# Amazonのページ解析で使うXPath
+# 検索結果は1件ごとのコンテナから、ASIN（data-asin）とサムネイルを組で取り出す（広告枠は除く）
+_SEARCH_RESULT_XPATH = etree.XPath('//div[@data-component-type="s-search-result"][normalize-space(@data-asin)][not(contains(@class, "AdHolder"))]')
+_RESULT_IMAGE_XPATH = etree.XPath(".//img[contains(concat(' ', normalize-space(@class), ' '), ' s-image ')]/@src")
+_MAIN_IMAGE_XPATH = etree.XPath('//img[@id="imgBlkFront"]/@src')
+_HIRES_IMAGE_XPATH = etree.XPath('//div[@id="img-canvas"]//img/@data-old-hires')
+_DYNAMIC_IMAGE_XPATH = etree.XPath('//img/@data-a-dynamic-image')
+
+# ASINから直接取得できるAmazonの書影URL
+_COVER_URL = "https://images-na.ssl-images-amazon.com/images/P/{asin}.01._SCRM_SL1500_.jpg"
+
+# 書影が存在しない場合に返される画像（1x1のGIF）と区別するための最小サイズ
+_MIN_COVER_BYTES = 1024
+
+# ページ取得時のヘッダー（User-AgentとAccept-Languageはセッションで設定済み）
+_HEADERS = {
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Upgrade-Insecure-Requests': '1',
+}
+
+
+def isbn_to_asin(isbn: str) -> Optional[str]:
+    """ISBNを書籍のASIN（ISBN-10）に変換"""
+    isbn = isbn.replace("-", "").strip().upper()
+    if len(isbn) == 10:
+        return isbn
+    if len(isbn) != 13 or not isbn.isdigit() or not isbn.startswith("978"):
+        return None
+
+    # ISBN-13の先頭978とチェックディジットを除き、ISBN-10のチェックディジットを再計算
+    body = isbn[3:12]
+    total = sum((10 - i) * int(d) for i, d in enumerate(body))
+    check = (11 - total % 11) % 11
+    return body + ("X" if check == 10 else str(check))
+
+
+def high_res_url(img_url: str) -> str:
+    """Amazon画像URLを高解像度版（SL1500）に変換"""
+    img_url = _IMG_SIZE_RE.sub('._SL1500_.jpg', img_url)
+    if not img_url.endswith('._SL1500_.jpg'):
+        base_url = img_url.split('?')[0]  # クエリパラメータを除去
+        if base_url.endswith('.jpg'):
+            img_url = base_url.rsplit('.jpg', 1)[0] + '._SL1500_.jpg'
+    return img_url
+
+
+def get_cover_by_asin(asin: str) -> Tuple[Optional[bytes], Optional[str]]:
+    """ASINからAmazonの書影を直接取得"""
+    img_url = _COVER_URL.format(asin=asin)
+    try:
+        image_data, content_type = download(img_url)
+    except Exception as e:
+        print(f"Amazonの書影の直接取得に失敗しました: {e}")
+        return None, None
+
+    # 書影がない場合は小さなダミー画像が返る
+    if len(image_data) < _MIN_COVER_BYTES:
+        return None, None
+
+    print(f"Amazonから画像を取得しました: {img_url}")
+    return image_data, content_type
+
+
+def _find_product_image(tree) -> Optional[str]:
+    """商品ページから画像URLを探す（複数の方法を試す）"""
+    # 方法1: メイン商品画像を探す
+    main_images = _MAIN_IMAGE_XPATH(tree)
+    if main_images and main_images[0]:
+        return main_images[0]
+
+    # 方法2: data-old-hires属性を持つ画像を探す
+    hires_images = _HIRES_IMAGE_XPATH(tree)
+    if hires_images and hires_images[0]:
+        return hires_images[0]
+
+    # 方法3: data-a-dynamic-image属性から高解像度画像を探す
+    for data in _DYNAMIC_IMAGE_XPATH(tree):
+        if 'books' in data.lower() or 'images' in data.lower():
+            # JSON（{URL: [幅, 高さ]}）から最大解像度の画像URLを選ぶ
+            try:
+                sizes = json.loads(data)
+            except ValueError:
+                continue
+            if sizes:
+                return max(sizes.items(), key=lambda kv: kv[1][0] * kv[1][1])[0]
+
+    return None
+
+
+def find_cover_url(title: str, author: Optional[str] = None) -> Tuple[Optional[str], Optional[str]]:
+    """Amazonの検索結果（なければ商品ページ）から高解像度の書影URLとASINを取得"""
+    # 検索クエリの作成
+    search_query = f"{title}"
+    if author:
+        search_query += f" {author}"
+    search_query += " 本"
+
+    # 検索結果ページを取得
+    search_url = "https://www.amazon.co.jp/s"
+    params = {'k': search_query, 'i': 'stripbooks'}
+    search_response = _SESSION.get(search_url, params=params, headers=_HEADERS, timeout=TIMEOUT)
+    search_response.raise_for_status()
+    search_tree = html.fromstring(search_response.content)
+
+    # 最初の検索結果からASINを取得
+    search_results = _SEARCH_RESULT_XPATH(search_tree)
+    if not search_results:
+        print(f"書籍が見つかりませんでした: {title}")
+        return None, None
+    result = search_results[0]
+    asin = result.get('data-asin').strip()
+
+    # 同じ検索結果のサムネイルがあれば、商品ページを取得せずに高解像度版を使う
+    search_images = _RESULT_IMAGE_XPATH(result)
+    if search_images and search_images[0]:
+        return high_res_url(urljoin(str(search_response.url), search_images[0])), asin
+
+    # 商品ページから画像URLを探す
+    amazon_url = f"https://www.amazon.co.jp/dp/{asin}"
+    response = _SESSION.get(amazon_url, headers=_HEADERS, timeout=TIMEOUT)
+    response.raise_for_status()
+    img_url = _find_product_image(html.fromstring(response.content))
+
+    if not img_url:
+        print(f"画像URLが見つかりませんでした: {title}")
+        return None, asin
+
+    # 相対URLを絶対URLに変換し、高解像度版にする
+    return high_res_url(urljoin(amazon_url, img_url)), asin
+
+
+def fetch_cover(title: str, author: Optional[str] = None, asin: Optional[str] = None) -> Tuple[Optional[bytes], Optional[str], Optional[str]]:
+    """Amazonから書影を取得し、画像データ・Content-Type・ASINを返す
+
+    ASINが分かっている場合は書影を直接取得し、検索ページ・商品ページの取得を省く。
+    """
+    if asin:
+        image_data, content_type = get_cover_by_asin(asin)
+        if image_data:
+            return image_data, content_type, asin
+
+    try:
+        img_url, found_asin = find_cover_url(title, author)
+        if not img_url:
+            return None, None, found_asin
+
+        # 画像をダウンロード
+        image_data, content_type = download(img_url)
+        print(f"Amazonから画像を取得しました: {img_url}")
+        return image_data, content_type, found_asin
+
+    except Exception as e:
+        print(f"Amazonからの画像取得に失敗しました: {e}")
+        return None, None, None
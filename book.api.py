@@ -1,18 +1,35 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 from dataclasses import dataclass
-from typing import Optional, Tuple, Dict
+from typing import Optional, Tuple, Dict, List
 from datetime import datetime
-import requests
 import os
 from PIL import Image
 from io import BytesIO
-import json
+import orjson
 import time
-from urllib.parse import quote
-from bs4 import BeautifulSoup
 import re
-from urllib.parse import urljoin
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from concurrent.futures import ThreadPoolExecutor
+from http_session import SESSION as _SESSION, TIMEOUT, download
+import amazon
+import book_cache
+from image_utils import is_instagram_ready_jpeg
+
+# 出版日から年を取り出す正規表現
+_YEAR_RE = re.compile(r'\d{4}')
+
+# ISBN検索時にGoogle Books APIから取得する項目
+_GOOGLE_BOOKS_FIELDS = "items(id,volumeInfo(title,authors,publisher,publishedDate,categories,imageLinks/thumbnail,industryIdentifiers))"
+
+
+def _google_image_url(thumbnail: str) -> str:
+    """Google Booksのサムネイルを高解像度（zoom=2）・HTTPSのURLに変換"""
+    parts = urlsplit(thumbnail)
+    query = dict(parse_qsl(parts.query, keep_blank_values=True))
+    query["zoom"] = "2"
+    return urlunsplit(("https", parts.netloc, parts.path, urlencode(query), parts.fragment))
+
 
 @dataclass
 class BookInfo:
@@ -25,6 +42,7 @@ class BookInfo:
     google_books_id: Optional[str] = None
     openlibrary_id: Optional[str] = None
     amazon_asin: Optional[str] = None
+    isbn: Optional[str] = None
     image_url: Optional[str] = None
     purchase_date: Optional[datetime] = None
     read_status: bool = False
@@ -41,6 +59,7 @@ class BookInfo:
             "google_books_id": self.google_books_id,
             "openlibrary_id": self.openlibrary_id,
             "amazon_asin": self.amazon_asin,
+            "isbn": self.isbn,
             "image_url": self.image_url,
             "purchase_date": self.purchase_date.isoformat() if self.purchase_date else None,
             "read_status": self.read_status,
@@ -61,92 +80,141 @@ class BookInfo:
 
     def fetch_book_info(self) -> bool:
         """Google BooksとOpenLibrary APIから書籍情報を取得して更新"""
-        # まずGoogle Books APIを試す
-        if self._fetch_from_google_books():
-            return True
-        
-        # Google Booksで見つからない場合はOpenLibraryを試す
-        if self._fetch_from_openlibrary():
-            return True
-        
+        # 両方のAPIへ並行して問い合わせ、両方の結果が揃ってから反映する
+        # （検索中のスレッドが参照するtitle/authorを途中で書き換えないため）
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [executor.submit(self._search_google_books), executor.submit(self._search_openlibrary)]
+            results = [future.result() for future in futures]
+
+        # Google Booksの結果を優先し、見つからない場合はOpenLibraryの結果を使う
+        for result in results:
+            if result:
+                self._apply_book_info(result)
+                return True
+
         return False
 
+    def _apply_book_info(self, info: Dict) -> None:
+        """取得した書籍情報を反映"""
+        for key, value in info.items():
+            setattr(self, key, value)
+
     def _fetch_from_google_books(self) -> bool:
         """Google Books APIから書籍情報を取得"""
+        info = self._search_google_books()
+        if info:
+            self._apply_book_info(info)
+            return True
+        return False
+
+    @book_cache.cached
+    def _search_google_books(self) -> Optional[Dict]:
+        """Google Books APIで書籍を検索し、更新する情報を返す"""
         try:
-            # 検索クエリの作成（タイトルのみで検索）
-            query = f'intitle:"{self.title}"'
-            if self.author:  # 著者名が指定されている場合は追加（オプション）
-                query += f' inauthor:"{self.author}"'
-            
-            # 日本語の書籍を優先的に検索
-            url = f"https://www.googleapis.com/books/v1/volumes?q={quote(query)}&langRestrict=ja&maxResults=10&orderBy=relevance"
-            response = requests.get(url)
+            url = "https://www.googleapis.com/books/v1/volumes"
+            if self.isbn:
+                # ISBNが分かっている場合は直接検索し、必要な項目だけを取得
+                params = {"q": f"isbn:{self.isbn}", "fields": _GOOGLE_BOOKS_FIELDS, "maxResults": 1}
+            else:
+                # 検索クエリの作成（タイトルのみで検索）
+                query = f'intitle:"{self.title}"'
+                if self.author:  # 著者名が指定されている場合は追加（オプション）
+                    query += f' inauthor:"{self.author}"'
+                
+                # 日本語の書籍を優先的に検索
+                params = {"q": query, "langRestrict": "ja", "maxResults": 10, "orderBy": "relevance"}
+            response = _SESSION.get(url, params=params, timeout=TIMEOUT)
             
             if response.status_code == 200:
-                data = response.json()
+                data = orjson.loads(response.content)
                 if "items" in data and len(data["items"]) > 0:
-                    # 最も関連性の高い結果を選択
-                    best_match = None
-                    highest_score = -1
+                    if self.isbn:
+                        # ISBNで検索した場合は該当する1件のみなのでスコア計算は不要
+                        best_match = data["items"][0]
+                    else:
+                        # 最も関連性の高い結果を選択
+                        best_match = None
+                        highest_score = -1
 
-                    for item in data["items"]:
-                        book = item["volumeInfo"]
-                        # 関連性スコアを計算
-                        score = self._calculate_relevance_score(book)
-                        if score > highest_score:
-                            highest_score = score
-                            best_match = item
+                        # 検索語の小文字化はループの外で一度だけ行う
+                        search_title_lower = self.title.lower()
+                        search_author_lower = self.author.lower() if self.author else None
+                        max_score = self._max_relevance_score(search_author_lower)
+
+                        for item in data["items"]:
+                            book = item["volumeInfo"]
+                            # 関連性スコアを計算
+                            score = self._calculate_relevance_score(book, search_title_lower, search_author_lower)
+                            if score > highest_score:
+                                highest_score = score
+                                best_match = item
+                                # 満点ならこれ以上良い候補はない
+                                if score >= max_score:
+                                    break
 
                     if best_match:
                         book = best_match["volumeInfo"]
-                        self.google_books_id = best_match["id"]
+                        info = {"google_books_id": best_match["id"]}
                         
                         # 情報を更新
                         if "publisher" in book and book["publisher"]:
-                            self.publisher = book["publisher"]
+                            info["publisher"] = book["publisher"]
                         
                         if "publishedDate" in book and book["publishedDate"]:
-                            self.publication_year = book["publishedDate"][:4]
+                            info["publication_year"] = book["publishedDate"][:4]
                         
                         if "categories" in book and book["categories"]:
-                            self.category = book["categories"][0]
+                            info["category"] = book["categories"][0]
 
                         if "authors" in book and book["authors"]:
-                            self.author = ", ".join(book["authors"])
+                            info["author"] = ", ".join(book["authors"])
+
+                        # ISBNを取得（ISBN-13を優先）
+                        identifiers = {i.get("type"): i.get("identifier") for i in book.get("industryIdentifiers", [])}
+                        isbn = identifiers.get("ISBN_13") or identifiers.get("ISBN_10")
+                        if isbn:
+                            info["isbn"] = isbn
                         
-                        if "imageLinks" in book:
-                            # 高解像度の画像URLを取得
-                            self.image_url = book["imageLinks"].get("thumbnail", "").replace("zoom=1", "zoom=2")
-                            # HTTPSに変換
-                            self.image_url = self.image_url.replace("http://", "https://")
+                        if "imageLinks" in book and book["imageLinks"].get("thumbnail"):
+                            info["image_url"] = _google_image_url(book["imageLinks"]["thumbnail"])
                         
-                        return True
+                        return info
             
-            return False
+            return None
             
         except Exception as e:
             print(f"Google Books APIでの検索に失敗: {e}")
-            return False
+            return None
 
-    def _calculate_relevance_score(self, book: Dict) -> float:
+    @staticmethod
+    def _max_relevance_score(search_author_lower: Optional[str]) -> float:
+        """関連性スコアの最大値（タイトル完全一致・著者一致・日本語・画像あり）"""
+        return 10.0 + (3.0 if search_author_lower else 0.0) + 2.0 + 1.0
+
+    @staticmethod
+    def _authors_match(authors: List[str], search_author_lower: str) -> bool:
+        """いずれかの著者名が検索した著者名と部分一致するか"""
+        for author in authors:
+            author_lower = author.lower()
+            if search_author_lower in author_lower or author_lower in search_author_lower:
+                return True
+        return False
+
+    def _calculate_relevance_score(self, book: Dict, search_title_lower: str, search_author_lower: Optional[str]) -> float:
         """書籍の関連性スコアを計算"""
         score = 0.0
         
         # タイトルの一致度をチェック
         if "title" in book:
             title_lower = book["title"].lower()
-            search_title_lower = self.title.lower()
             if title_lower == search_title_lower:
                 score += 10.0
             elif search_title_lower in title_lower or title_lower in search_title_lower:
                 score += 5.0
 
         # 著者名が指定されている場合、著者の一致度をチェック
-        if self.author and "authors" in book:
-            author_lower = [a.lower() for a in book["authors"]]
-            search_author_lower = self.author.lower()
-            if any(search_author_lower in a or a in search_author_lower for a in author_lower):
+        if search_author_lower and "authors" in book:
+            if self._authors_match(book["authors"], search_author_lower):
                 score += 3.0
 
         # 日本語の書籍を優先
@@ -161,74 +229,131 @@ class BookInfo:
 
     def _fetch_from_openlibrary(self) -> bool:
         """OpenLibrary APIから書籍情報を取得"""
+        info = self._search_openlibrary()
+        if info:
+            self._apply_book_info(info)
+            return True
+        return False
+
+    @book_cache.cached
+    def _search_openlibrary(self) -> Optional[Dict]:
+        """OpenLibrary APIで書籍を検索し、更新する情報を返す"""
+        if self.isbn:
+            return self._search_openlibrary_by_isbn()
+
         try:
             # 検索クエリの作成（タイトルのみで検索）
             query = f'title:"{self.title}"'
             if self.author:  # 著者名が指定されている場合は追加（オプション）
                 query += f' author:"{self.author}"'
             
-            url = f"https://openlibrary.org/search.json?q={quote(query)}&lang=jpn&limit=10"
-            response = requests.get(url)
+            url = "https://openlibrary.org/search.json"
+            params = {"q": query, "lang": "jpn", "limit": 10}
+            response = _SESSION.get(url, params=params, timeout=TIMEOUT)
             
             if response.status_code == 200:
-                data = response.json()
+                data = orjson.loads(response.content)
                 if "docs" in data and len(data["docs"]) > 0:
                     # 最も関連性の高い結果を選択
                     best_match = None
                     highest_score = -1
 
+                    # 検索語の小文字化はループの外で一度だけ行う
+                    search_title_lower = self.title.lower()
+                    search_author_lower = self.author.lower() if self.author else None
+                    max_score = self._max_relevance_score(search_author_lower)
+
                     for doc in data["docs"]:
-                        score = self._calculate_openlibrary_relevance_score(doc)
+                        score = self._calculate_openlibrary_relevance_score(doc, search_title_lower, search_author_lower)
                         if score > highest_score:
                             highest_score = score
                             best_match = doc
+                            # 満点ならこれ以上良い候補はない
+                            if score >= max_score:
+                                break
 
                     if best_match:
-                        self.openlibrary_id = best_match.get("key")
+                        info = {"openlibrary_id": best_match.get("key")}
                         
                         # 情報を更新
                         if "publisher" in best_match and best_match["publisher"]:
-                            self.publisher = best_match["publisher"][0]
+                            info["publisher"] = best_match["publisher"][0]
                         
                         if "first_publish_year" in best_match:
-                            self.publication_year = str(best_match["first_publish_year"])
+                            info["publication_year"] = str(best_match["first_publish_year"])
                         
                         if "subject" in best_match and best_match["subject"]:
-                            self.category = best_match["subject"][0]
+                            info["category"] = best_match["subject"][0]
 
                         if "author_name" in best_match and best_match["author_name"]:
-                            self.author = ", ".join(best_match["author_name"])
+                            info["author"] = ", ".join(best_match["author_name"])
                         
                         # 画像URLの取得
                         if "cover_i" in best_match:
-                            self.image_url = f"https://covers.openlibrary.org/b/id/{best_match['cover_i']}-L.jpg"
+                            info["image_url"] = f"https://covers.openlibrary.org/b/id/{best_match['cover_i']}-L.jpg"
                         
-                        return True
+                        return info
             
-            return False
+            return None
             
         except Exception as e:
             print(f"OpenLibrary APIでの検索に失敗: {e}")
-            return False
+            return None
+
+    def _search_openlibrary_by_isbn(self) -> Optional[Dict]:
+        """OpenLibrary Books APIでISBNから書籍情報を取得"""
+        try:
+            bibkey = f"ISBN:{self.isbn}"
+            url = "https://openlibrary.org/api/books"
+            params = {"bibkeys": bibkey, "format": "json", "jscmd": "data"}
+            response = _SESSION.get(url, params=params, timeout=TIMEOUT)
+            
+            if response.status_code == 200:
+                book = orjson.loads(response.content).get(bibkey)
+                if book:
+                    info = {"openlibrary_id": book.get("key")}
+                    
+                    # 情報を更新
+                    if book.get("publishers"):
+                        info["publisher"] = book["publishers"][0]["name"]
+                    
+                    year_match = _YEAR_RE.search(book.get("publish_date", ""))
+                    if year_match:
+                        info["publication_year"] = year_match.group(0)
+                    
+                    if book.get("subjects"):
+                        info["category"] = book["subjects"][0]["name"]
 
-    def _calculate_openlibrary_relevance_score(self, doc: Dict) -> float:
+                    if book.get("authors"):
+                        info["author"] = ", ".join(a["name"] for a in book["authors"])
+                    
+                    # 画像URLの取得
+                    if "large" in book.get("cover", {}):
+                        info["image_url"] = book["cover"]["large"]
+                    
+                    return info
+            
+            return None
+            
+        except Exception as e:
+            print(f"OpenLibrary APIでの検索に失敗: {e}")
+            return None
+
+    def _calculate_openlibrary_relevance_score(self, doc: Dict, search_title_lower: str, search_author_lower: Optional[str]) -> float:
         """OpenLibrary検索結果の関連性スコアを計算"""
         score = 0.0
         
         # タイトルの一致度をチェック
         if "title" in doc:
             title_lower = doc["title"].lower()
-            search_title_lower = self.title.lower()
             if title_lower == search_title_lower:
                 score += 10.0
             elif search_title_lower in title_lower or title_lower in search_title_lower:
                 score += 5.0
 
         # 著者名が指定されている場合、著者の一致度をチェック
-        if self.author and "author_name" in doc:
-            author_lower = [a.lower() for a in doc["author_name"]]
-            search_author_lower = self.author.lower()
-            if any(search_author_lower in a or a in search_author_lower for a in author_lower):
+        if search_author_lower and "author_name" in doc:
+            if self._authors_match(doc["author_name"], search_author_lower):
                 score += 3.0
 
         # 日本語の書籍を優先
@@ -243,21 +368,33 @@ class BookInfo:
 
     def get_book_image(self) -> Tuple[Optional[bytes], Optional[str]]:
         """書籍の画像データを取得"""
-        # まずAmazonから画像を取得を試みる
-        amazon_image = self._get_amazon_image()
-        if amazon_image:
-            return amazon_image
-
-        # Amazonで失敗した場合は他のAPIを試す
-        if not self.image_url:
-            if not self.fetch_book_info():
-                return None, None
-        
+        # まずAmazon（キャッシュ・ASINからの直接取得を含む）から画像を取得を試みる
+        image_data, content_type = self._get_amazon_image()
+        if image_data:
+            return image_data, content_type
+
+        # Amazonで失敗した場合は取得済みの画像URLを使う
         if self.image_url:
+            return self._download_image(self.image_url)
+
+        # 画像URLがなければGoogle BooksとOpenLibraryを並行して検索する
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [executor.submit(self._search_google_books), executor.submit(self._search_openlibrary)]
+            image_urls = [info.get("image_url") for info in (future.result() for future in futures) if info]
+
+        # Google Booksの書影を優先し、取得できた最初の画像だけをダウンロードする
+        for image_url in image_urls:
+            image_data, content_type = self._download_image(image_url)
+            if image_data:
+                return image_data, content_type
+
+        return None, None
+
+    def _download_image(self, image_url: Optional[str]) -> Tuple[Optional[bytes], Optional[str]]:
+        """画像URLから画像データを取得"""
+        if image_url:
             try:
-                response = requests.get(self.image_url)
-                if response.status_code == 200:
-                    return response.content, response.headers.get('content-type', 'image/jpeg')
+                return download(image_url)
             except Exception as e:
                 print(f"画像の取得に失敗しました: {e}")
         
@@ -265,104 +402,32 @@ class BookInfo:
 
     def _get_amazon_image(self) -> Tuple[Optional[bytes], Optional[str]]:
         """Amazonから書籍の画像を取得"""
-        try:
-            # 検索クエリの作成
-            search_query = f"{self.title}"
-            if self.author:
-                search_query += f" {self.author}"
-            search_query += " 本"
-            
-            # Amazonの検索URL
-            search_url = f"https://www.amazon.co.jp/s?k={requests.utils.quote(search_query)}&i=stripbooks"
-            
-            # ヘッダーを設定
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                'Accept-Language': 'ja,en-US;q=0.7,en;q=0.3',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1',
-            }
-            
-            # 検索結果ページを取得
-            search_response = requests.get(search_url, headers=headers)
-            search_response.raise_for_status()
-            
-            # BeautifulSoupでパース
-            search_soup = BeautifulSoup(search_response.text, 'html.parser')
-            
-            # 検索結果から最初の書籍のURLを取得
-            product_link = search_soup.find('a', {'class': 's-link-style'})
-            if not product_link:
-                print(f"書籍が見つかりませんでした: {self.title}")
-                return None, None
-            
-            # 商品ページのURLを取得してASINを抽出
-            product_url = product_link['href']
-            asin_match = re.search(r'/dp/([A-Z0-9]{10})(?:[/?]|$)', product_url)
-            if asin_match:
-                self.amazon_asin = asin_match.group(1)
-            
-            # 商品ページを取得
-            amazon_url = f"https://www.amazon.co.jp/dp/{self.amazon_asin}" if self.amazon_asin else urljoin('https://www.amazon.co.jp', product_url)
-            response = requests.get(amazon_url, headers=headers)
-            response.raise_for_status()
-            
-            # BeautifulSoupでパース
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # 画像URLを探す（複数の方法を試す）
-            img_url = None
-            
-            # 方法1: メイン商品画像を探す
-            main_image = soup.find('img', id='imgBlkFront')
-            if main_image and 'src' in main_image.attrs:
-                img_url = main_image['src']
-            
-            # 方法2: data-old-hires属性を持つ画像を探す
-            if not img_url:
-                image_div = soup.find('div', id='img-canvas')
-                if image_div:
-                    img = image_div.find('img', attrs={'data-old-hires': True})
-                    if img:
-                        img_url = img['data-old-hires']
-            
-            # 方法3: data-a-dynamic-image属性から高解像度画像を探す
-            if not img_url:
-                images = soup.find_all('img', attrs={'data-a-dynamic-image': True})
-                for img in images:
-                    data = img['data-a-dynamic-image']
-                    if 'books' in data.lower() or 'images' in data.lower():
-                        # JSON文字列から最大解像度の画像URLを抽出
-                        urls = re.findall(r'\"(https://[^\"]+)\"', data)
-                        if urls:
-                            img_url = urls[0]
-                            break
-            
-            if img_url:
-                # 相対URLを絶対URLに変換
-                img_url = urljoin(amazon_url, img_url)
-                
-                # URLを高解像度版に変換（SL1500_.jpg）
-                img_url = re.sub(r'\._.*?_\.jpg', '._SL1500_.jpg', img_url)
-                if not img_url.endswith('._SL1500_.jpg'):
-                    base_url = img_url.split('?')[0]  # クエリパラメータを除去
-                    if base_url.endswith('.jpg'):
-                        img_url = base_url.rsplit('.jpg', 1)[0] + '._SL1500_.jpg'
-                
-                # 画像をダウンロード
-                img_response = requests.get(img_url, headers=headers)
-                img_response.raise_for_status()
-                
-                print(f"Amazonから画像を取得しました: {img_url}")
-                return img_response.content, img_response.headers.get('content-type', 'image/jpeg')
-            
-            print(f"画像URLが見つかりませんでした: {self.title}")
-            return None, None
-            
-        except Exception as e:
-            print(f"Amazonからの画像取得に失敗しました: {e}")
-            return None, None
+        # 以前に取得した画像があればAmazonへアクセスせずに使う
+        asin = self.amazon_asin or book_cache.load("amazon_asin", self.title, self.author)
+        if asin:
+            image_data = book_cache.load_image(asin)
+            if image_data:
+                self.amazon_asin = asin
+                print(f"キャッシュから画像を取得しました: {asin}")
+                return image_data, 'image/jpeg'
+
+        image_data, content_type, asin = amazon.fetch_cover(self.title, self.author, asin or self._find_amazon_asin())
+        if asin:
+            self.amazon_asin = asin
+            if image_data:
+                book_cache.store("amazon_asin", self.title, self.author, asin)
+                book_cache.save_image(asin, image_data)
+        return image_data, content_type
+
+    def _find_amazon_asin(self) -> Optional[str]:
+        """ISBN（不明な場合はGoogle Booksの検索結果から取得）からASINを求める"""
+        isbn = self.isbn
+        if not isbn:
+            # 検索結果はキャッシュされるため、fetch_book_info済みなら通信は発生しない
+            info = self._search_google_books()
+            isbn = info.get("isbn") if info else None
+
+        return amazon.isbn_to_asin(isbn) if isbn else None
 
     def save_image_for_instagram(self, image_data: bytes, content_type: str) -> str:
         """Instagramに投稿するための画像を保存"""
@@ -373,25 +438,23 @@ class BookInfo:
         # 画像の保存先ファイル名を設定
         temp_filename = os.path.join(temp_dir, f"book_image_{int(datetime.now().timestamp())}.jpg")
         
-        # 画像をPILで開く
-        img = Image.open(BytesIO(image_data))
-        
-        # RGBAの場合はRGBに変換
-        if img.mode == 'RGBA':
-            # 白背景を作成
-            background = Image.new('RGB', img.size, 'white')
-            # アルファチャンネルを考慮して合成
-            background.paste(img, mask=img.split()[3])
-            img = background
-        elif img.mode != 'RGB':
-            img = img.convert('RGB')
+        # そのまま投稿できるJPEGは再エンコードせずに保存
+        if is_instagram_ready_jpeg(image_data):
+            with open(temp_filename, 'wb') as f:
+                f.write(image_data)
+            return temp_filename
         
         # Instagram要件に合わせてサイズ調整
         target_width = 1440  # Instagram推奨サイズ
         target_height = int(1440 * (5/4))  # 4:5のアスペクト比
         
-        # 白背景の画像を作成
-        new_img = Image.new("RGB", (target_width, target_height), "white")
+        # 画像をPILで開く（JPEGは必要以上の解像度でデコードしない）
+        img = Image.open(BytesIO(image_data))
+        img.draft('RGB', (target_width, target_height))
+        
+        # RGBAはリサイズ後に白背景へ直接合成するため、それ以外をRGBに変換
+        if img.mode not in ('RGB', 'RGBA'):
+            img = img.convert('RGB')
         
         # 元画像のアスペクト比を保持しながら、新しいサイズに合わせてリサイズ
         aspect = img.height / img.width
@@ -409,8 +472,9 @@ class BookInfo:
         x = (target_width - new_width) // 2
         y = (target_height - new_height) // 2
         
-        # 画像を貼り付け
-        new_img.paste(img, (x, y))
+        # 白背景へ貼り付け（RGBAはアルファチャンネルをマスクにして合成も同時に行う）
+        new_img = Image.new("RGB", (target_width, target_height), "white")
+        new_img.paste(img, (x, y), mask=img if img.mode == 'RGBA' else None)
         
         # 画像を保存（高品質設定）
         new_img.save(
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import functools
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Optional
+
+# キャッシュの保存先と有効期限（30日）
+CACHE_DIR = ".bookcache"
+IMAGE_CACHE_DIR = os.path.join(CACHE_DIR, "images")
+CACHE_TTL = 30 * 24 * 60 * 60
+
+
+def _cache_key(name: str, title: str, author: Optional[str], isbn: Optional[str] = None) -> str:
+    """関数名・タイトル・著者名（ISBNがあればISBN）からキャッシュキーを作成"""
+    title = (title or "").lower().strip()
+    author = (author or "").lower().strip()
+    key = f"{name}:{title}:{author}"
+    if isbn:
+        key += f":isbn:{isbn.replace('-', '').strip()}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    """一時ファイル経由で書き込み、読み込み途中のファイルを見せない"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+def _cache_path(key: str) -> str:
+    """キャッシュキーから保存先のパスを作成"""
+    return os.path.join(CACHE_DIR, f"{key}.json")
+
+
+def _load_path(path: str) -> Optional[Any]:
+    """キャッシュファイルから値を取得（期限切れ・未登録の場合はNone）"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if time.time() - entry.get("time", 0) > CACHE_TTL:
+        return None
+    return entry.get("value")
+
+
+def _store_path(path: str, value: Any) -> None:
+    """値をキャッシュファイルに保存"""
+    entry = {"time": time.time(), "value": value}
+    try:
+        _write_atomic(path, json.dumps(entry, ensure_ascii=False).encode("utf-8"))
+    except OSError as e:
+        print(f"キャッシュの保存に失敗しました: {e}")
+
+
+def load(name: str, title: str, author: Optional[str], isbn: Optional[str] = None) -> Optional[Any]:
+    """キャッシュから値を取得（期限切れ・未登録の場合はNone）"""
+    return _load_path(_cache_path(_cache_key(name, title, author, isbn)))
+
+
+def store(name: str, title: str, author: Optional[str], value: Any, isbn: Optional[str] = None) -> None:
+    """値をキャッシュに保存"""
+    _store_path(_cache_path(_cache_key(name, title, author, isbn)), value)
+
+
+def cached(func):
+    """(title, author, isbn)をキーに結果をディスクへキャッシュするメソッド用デコレータ
+
+    ISBNの有無で検索方法が変わるため、ISBNが分かっている場合はキーに含める。
+    キーは呼び出し前に一度だけ作成し、実行中に属性が変わっても問い合わせた条件で保存する。
+    Noneは失敗の可能性があるためキャッシュしない。
+    """
+    @functools.wraps(func)
+    def wrapper(self):
+        path = _cache_path(_cache_key(func.__name__, self.title, self.author, getattr(self, "isbn", None)))
+        value = _load_path(path)
+        if value is not None:
+            return value
+
+        value = func(self)
+        if value is not None:
+            _store_path(path, value)
+        return value
+
+    return wrapper
+
+
+def load_image(asin: str) -> Optional[bytes]:
+    """ASINをキーにキャッシュ済みの画像を取得"""
+    path = os.path.join(IMAGE_CACHE_DIR, f"{asin}.jpg")
+    try:
+        if time.time() - os.path.getmtime(path) > CACHE_TTL:
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def save_image(asin: str, image_data: bytes) -> None:
+    """ASINをキーに画像をキャッシュ"""
+    try:
+        _write_atomic(os.path.join(IMAGE_CACHE_DIR, f"{asin}.jpg"), image_data)
+    except OSError as e:
+        print(f"画像キャッシュの保存に失敗しました: {e}")
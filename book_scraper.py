@@ -1,12 +1,12 @@
 #!/usr/bin/env python3
-import requests
 import os
 import time
-import json
+import orjson
+from http_session import SESSION as _SESSION, TIMEOUT, download
 
-def get_book_image(title, author=''):
+def find_isbn(title, author=''):
     """
-    OpenBD APIを使用して書籍の画像URLを取得する関数
+    OpenBD APIで書籍を検索し、最初の検索結果のISBNを返す関数
     """
     # OpenBD APIのエンドポイント（書籍検索用）
     search_url = "https://api.openbd.jp/v1/search"
@@ -18,41 +18,45 @@ def get_book_image(title, author=''):
         'limit': 10
     }
     
-    # ユーザーエージェントを設定
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
+    # APIから書籍を検索
+    search_response = _SESSION.get(search_url, params=params, timeout=TIMEOUT)
+    search_response.raise_for_status()
     
+    # 検索結果をパース
+    search_data = orjson.loads(search_response.content)
+    
+    if search_data and len(search_data) > 0:
+        # 最初の検索結果のISBNを取得
+        isbn = search_data[0].get('isbn')
+        if not isbn:
+            print(f"ISBNが見つかりませんでした: {title}")
+        return isbn
+    
+    print(f"書籍が見つかりませんでした: {title}")
+    return None
+
+def get_book_image(title, author=''):
+    """
+    OpenBD APIを使用して書籍の画像URLを取得する関数
+    """
     try:
-        # APIから書籍を検索
-        search_response = requests.get(search_url, params=params)
-        search_response.raise_for_status()
-        
-        # 検索結果をパース
-        search_data = search_response.json()
+        isbn = find_isbn(title, author)
         
-        if search_data and len(search_data) > 0:
-            # 最初の検索結果のISBNを取得
-            isbn = search_data[0].get('isbn')
-            if not isbn:
-                print(f"ISBNが見つかりませんでした: {title}")
-                return None, None
-            
+        if isbn:
             # 書籍詳細を取得
             detail_url = f"https://api.openbd.jp/v1/get/{isbn}"
-            detail_response = requests.get(detail_url)
+            detail_response = _SESSION.get(detail_url, timeout=TIMEOUT)
             detail_response.raise_for_status()
             
             # JSONをパース
-            data = detail_response.json()
+            data = orjson.loads(detail_response.content)
             
             if data and data[0]:
                 # 書影のURLを取得
                 img_url = data[0].get('summary', {}).get('cover')
                 if img_url:
                     # 画像をダウンロード
-                    img_response = requests.get(img_url, headers=headers)
-                    img_response.raise_for_status()
+                    image_data, content_type = download(img_url)
                     
                     # 一時ディレクトリを作成
                     os.makedirs('temp_images', exist_ok=True)
@@ -60,14 +64,12 @@ def get_book_image(title, author=''):
                     # 画像を保存
                     image_path = os.path.join('temp_images', f'book_image_{int(time.time())}.jpg')
                     with open(image_path, 'wb') as f:
-                        f.write(img_response.content)
+                        f.write(image_data)
                     
                     print(f"OpenBD APIから画像を取得しました: {img_url}")
-                    return image_path, img_response.headers.get('content-type', 'image/jpeg')
+                    return image_path, content_type
                 else:
                     print(f"書影が見つかりませんでした: {title}")
-        else:
-            print(f"書籍が見つかりませんでした: {title}")
     
     except Exception as e:
         print(f"OpenBD APIからの画像取得に失敗しました: {e}")
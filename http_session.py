@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from io import BytesIO
+from typing import Tuple
+import time
+import httpx
+
+# 共通のリクエストヘッダー
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept-Language': 'ja,en-US;q=0.7,en;q=0.3',
+}
+
+# タイムアウト（接続3秒, 読み込み10秒）
+TIMEOUT = httpx.Timeout(10, connect=3)
+
+# ダウンロードする画像の上限サイズ
+MAX_IMAGE_BYTES = 8 << 20
+
+# リトライの設定
+RETRY_TOTAL = 3
+RETRY_BACKOFF = 0.3
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class RetryTransport(httpx.HTTPTransport):
+    """一時的なエラー（429/5xx）を指数バックオフでリトライするトランスポート"""
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        for attempt in range(RETRY_TOTAL):
+            response = super().handle_request(request)
+            if response.status_code not in RETRY_STATUSES:
+                return response
+            response.close()
+            time.sleep(RETRY_BACKOFF * (2 ** attempt))
+        return super().handle_request(request)
+
+
+def create_session() -> httpx.Client:
+    """HTTP/2・コネクションプール・リトライを設定したクライアントを作成"""
+    # 同一ホストへの接続を使い回し（HTTP/2では1接続で多重化）、一時的なエラーはリトライする
+    transport = RetryTransport(
+        http2=True,
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        retries=RETRY_TOTAL  # 接続エラーのリトライ
+    )
+    return httpx.Client(
+        transport=transport,
+        headers=DEFAULT_HEADERS,
+        timeout=TIMEOUT,
+        follow_redirects=True
+    )
+
+
+# モジュール全体で共有するクライアント
+SESSION = create_session()
+
+
+def download(url: str, max_bytes: int = MAX_IMAGE_BYTES, **kwargs) -> Tuple[bytes, str]:
+    """画像をストリーミングで取得し、データとContent-Typeを返す
+
+    上限サイズを超えた場合はValueErrorを送出する。
+    """
+    with SESSION.stream('GET', url, **kwargs) as response:
+        response.raise_for_status()
+
+        # Content-Lengthが分かる場合は本文を読む前に判定する
+        content_length = response.headers.get('content-length')
+        if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+            raise ValueError(f"画像サイズが上限を超えています: {url}")
+
+        buffer = BytesIO()
+        for chunk in response.iter_bytes(chunk_size=65536):
+            buffer.write(chunk)
+            if buffer.tell() > max_bytes:
+                raise ValueError(f"画像サイズが上限を超えています: {url}")
+
+        return buffer.getvalue(), response.headers.get('content-type', 'image/jpeg')
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from io import BytesIO
+from PIL import Image
+
+# JPEGファイルの先頭バイト（SOIマーカー）
+_JPEG_MAGIC = b'\xff\xd8\xff'
+
+# Instagramの推奨最小サイズ（幅・高さとも）と、投稿できるアスペクト比（幅/高さ）の範囲
+INSTAGRAM_MIN_SIZE = 1080
+INSTAGRAM_MIN_ASPECT = 4 / 5
+INSTAGRAM_MAX_ASPECT = 1.91
+
+
+def is_instagram_ready_jpeg(image_data: bytes) -> bool:
+    """再エンコードせずにそのままInstagramへ投稿できるJPEGかどうか
+
+    ヘッダーのみを読み、画素データはデコードしない。
+    """
+    if not image_data.startswith(_JPEG_MAGIC):
+        return False
+
+    try:
+        img = Image.open(BytesIO(image_data))
+    except Exception:
+        return False
+
+    width, height = img.size
+    if img.mode != 'RGB' or width < INSTAGRAM_MIN_SIZE or height < INSTAGRAM_MIN_SIZE:
+        return False
+    return INSTAGRAM_MIN_ASPECT <= width / height <= INSTAGRAM_MAX_ASPECT
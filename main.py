@@ -1,17 +1,12 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
+# 重いモジュール（googleapiclient, instagrapi, PIL, lxml, httpx）は
+# `--help` などで読み込まないよう、使用するメソッド内でインポートする
 import os
-import requests
-from googleapiclient.discovery import build
-from PIL import Image
 from dotenv import load_dotenv
 import json
-import urllib.parse
 import click
-from instagrapi import Client
-from bs4 import BeautifulSoup
 import io
-import re
 
 # 環境変数の読み込み
 load_dotenv()
@@ -21,49 +16,36 @@ class BookPoster:
         self.google_books_api_key = os.getenv('GOOGLE_BOOKS_API_KEY')
         self.instagram_username = os.getenv('INSTAGRAM_USERNAME')
         self.instagram_password = os.getenv('INSTAGRAM_PASSWORD')
-        self.service = build('books', 'v1', developerKey=self.google_books_api_key)
-        self.cl = Client()
-        self.cl.login(self.instagram_username, self.instagram_password)
-
-    def modify_amazon_image_url(self, url):
-        """Amazon画像URLを高解像度版に変更"""
-        if not url:
-            return None
+        self._service = None
+        self._cl = None
+        self.isbn = None  # 選択した書籍のISBN（Amazonの書影の直接取得に使う）
+
+    @property
+    def service(self):
+        """Google Books APIのサービス（初回使用時に作成）"""
+        if self._service is None:
+            from googleapiclient.discovery import build
+            self._service = build('books', 'v1', developerKey=self.google_books_api_key)
+        return self._service
+
+    @property
+    def cl(self):
+        """Instagramのクライアント（初回使用時にログイン）"""
+        if self._cl is None:
+            from instagrapi import Client
+            cl = Client()
+            cl.login(self.instagram_username, self.instagram_password)
+            self._cl = cl
+        return self._cl
+
+    def get_amazon_image(self, title, author=None):
+        """Amazonから書籍の画像データを取得"""
+        import amazon
         
-        # URLから基本部分を抽出
-        base_url = re.sub(r'\.[^.]+\.jpg', '', url)
-        if not base_url:
-            return url
-            
-        # SL1500.jpgを付加
-        return f"{base_url}.SL1500.jpg"
-
-    def get_amazon_image_url(self, title, author=None):
-        """Amazonから書籍の画像URLを取得"""
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        # 著者名がある場合は検索クエリに追加
-        search_query = f"{title}"
-        if author:
-            search_query += f" {author}"
-            
-        search_url = f"https://www.amazon.co.jp/s?k={urllib.parse.quote(search_query)}&i=stripbooks"
-        
-        try:
-            response = requests.get(search_url, headers=headers)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # 商品画像を探す
-            img_element = soup.select_one('img.s-image')
-            if img_element and 'src' in img_element.attrs:
-                # 画像URLを高解像度版に変更
-                return self.modify_amazon_image_url(img_element['src'])
-        except Exception as e:
-            print(f"画像URL取得中にエラーが発生しました: {e}")
-        
-        return None
+        # ISBNが分かっていれば、ASINから書影を直接取得する
+        asin = amazon.isbn_to_asin(self.isbn) if self.isbn else None
+        image_data, _, _ = amazon.fetch_cover(title, author, asin)
+        return image_data
 
     def search_books(self, title):
         """Google Books APIで詳細検索を実行"""
@@ -117,6 +99,10 @@ class BookPoster:
         book = self.search_books(title)
         
         if book:
+            # ISBNを記録（ISBN-13を優先）
+            identifiers = {i.get('type'): i.get('identifier') for i in book.get('industryIdentifiers', [])}
+            self.isbn = identifiers.get('ISBN_13') or identifiers.get('ISBN_10')
+            
             info = {
                 'title': book.get('title', '不明'),
                 'authors': ', '.join(book.get('authors', ['不明'])),
@@ -147,17 +133,20 @@ class BookPoster:
         }
         return info
 
-    def download_and_save_image(self, image_url):
+    def save_image(self, image_data):
+        from PIL import Image
+        from image_utils import is_instagram_ready_jpeg
+        
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            response = requests.get(image_url, headers=headers)
-            if response.status_code != 200:
-                print(f"高解像度画像の取得に失敗しました。ステータスコード: {response.status_code}")
-                return None
-                
-            image = Image.open(io.BytesIO(response.content))
+            temp_image_path = 'temp_book_post.jpg'
+            
+            # そのまま投稿できるJPEGは再エンコードせずに保存
+            if is_instagram_ready_jpeg(image_data):
+                with open(temp_image_path, 'wb') as f:
+                    f.write(image_data)
+                return temp_image_path
+            
+            image = Image.open(io.BytesIO(image_data))
             
             # 画像のリサイズ（アスペクト比を保持）
             max_size = (1080, 1080)
@@ -172,7 +161,6 @@ class BookPoster:
             background.paste(image, offset)
             
             # 一時ファイルとして保存
-            temp_image_path = 'temp_book_post.jpg'
             background.save(temp_image_path, quality=95)
             return temp_image_path
         except Exception as e:
@@ -218,13 +206,13 @@ def post_book():
 
     if click.confirm("\nこの情報でInstagramに投稿しますか？", default=True):
         # Amazonから画像を取得（著者名も含めて検索）
-        amazon_image_url = poster.get_amazon_image_url(title, book_info['authors'])
-        if not amazon_image_url:
+        image_data = poster.get_amazon_image(title, book_info['authors'])
+        if not image_data:
             print("エラー: Amazonの画像を取得できませんでした。")
             return
         
-        # 画像をダウンロードして保存
-        image_path = poster.download_and_save_image(amazon_image_url)
+        # 画像を投稿用に加工して保存
+        image_path = poster.save_image(image_data)
         if image_path:
             poster.post_to_instagram(image_path, book_info)
             os.remove(image_path)